@@ -5,32 +5,150 @@ Handles both validation checks and actual callbacks
 """
 
 from flask import Flask, request, jsonify, Response
-import json
+import functools
+import orjson
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 import os
 
 app = Flask(__name__)
 
-# Store callbacks in memory and file
-callbacks_received = []
-CALLBACKS_FILE = "verifymyage_callbacks.json"
+# Request threads only enqueue log records; the background listener does
+# the actual console writes, so stdout I/O never holds a request thread
+_log_queue = queue.SimpleQueue()
+logger = logging.getLogger('webhook')
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+
+# Store callbacks in memory and file. The file is newline-delimited JSON
+# so each callback is one append — rewriting the whole growing list per
+# POST made callback K cost O(K) disk work. In memory only a bounded tail
+# is kept (the JSONL file is the full history), so a long-running server
+# doesn't grow without limit
+callbacks_received = deque(maxlen=1000)
+CALLBACKS_FILE = "verifymyage_callbacks.jsonl"
+
+# Monotonic count of callbacks ever received — the deque's length
+# saturates at maxlen, so it can serve neither as an acknowledgment ID
+# nor as the long-poll predicate. Mutated only under `new_callback`.
+callbacks_total = 0
+
+# Long-poll support: /webhooks?wait=N blocks on this condition until a
+# new callback arrives, so clients get results the moment they land
+# instead of on their next 5s poll
+new_callback = threading.Condition()
+
+# In-process completion hook: code that runs the server in its own
+# process can wait on this event instead of touching /webhooks at all
+callback_event = threading.Event()
+
+# Only the headers worth keeping per callback — copying the whole header
+# map into a dict per POST is wasted CPU and bloats the stored records
+KEEP_HEADERS = ('Content-Type', 'Content-Length', 'User-Agent',
+                'X-Signature', 'X-Verifymyage-Event', 'X-Forwarded-For')
+
+# CORS preflight headers never change; build them once
+_PREFLIGHT_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, HEAD, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+}
+
+@functools.lru_cache(maxsize=1)
+def _load_callbacks_cached(mtime_ns):
+    """Parse the JSONL file; keyed on mtime so unchanged files hit the cache"""
+    callbacks = []
+    with open(CALLBACKS_FILE, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                callbacks.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                # A torn trailing line (crash mid-append) costs that one
+                # record, not the whole history
+                continue
+    return callbacks
 
 def load_callbacks():
-    """Load existing callbacks from file"""
-    if os.path.exists(CALLBACKS_FILE):
-        try:
-            with open(CALLBACKS_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+    """Load existing callbacks from the JSONL file
+
+    The parse is cached against the file's mtime_ns, so back-to-back reads
+    (a dashboard polling /webhooks) reparse only after an actual write.
+    """
+    try:
+        mtime_ns = os.stat(CALLBACKS_FILE).st_mtime_ns
+        return _load_callbacks_cached(mtime_ns)
+    except OSError:
+        # Missing or unreadable file — anything else should surface
+        return []
+
+# Appends run on the worker pool, so they must be serialized: a record
+# larger than the write buffer flushes as several write() calls, and two
+# concurrent appends would interleave and corrupt both lines
+_save_lock = threading.Lock()
 
 def save_callback(callback_data):
-    """Save callback to file"""
-    callbacks = load_callbacks()
-    callbacks.append(callback_data)
-    with open(CALLBACKS_FILE, 'w') as f:
-        json.dump(callbacks, f, indent=2)
+    """Append one callback to the JSONL file — no read-modify-rewrite"""
+    with _save_lock:
+        with open(CALLBACKS_FILE, 'ab', buffering=1 << 16) as f:
+            f.write(orjson.dumps(callback_data) + b"\n")
+
+# Heavy per-callback work (disk writes, summarization) runs here so the
+# request thread can acknowledge the sender immediately
+_worker = ThreadPoolExecutor(max_workers=4)
+
+def process_callback_record(callback_record, content_type):
+    """Persist, summarize, and log one callback off the request thread"""
+    try:
+        save_callback(callback_record)
+        data = callback_record["data"]
+
+        logger.info("\n%s\n✅ CALLBACK RECEIVED at %s\n%s\nFrom: %s\nMethod: %s\nContent-Type: %s",
+                    '='*60, callback_record['timestamp'], '='*60,
+                    callback_record['remote_addr'], callback_record['method'],
+                    content_type)
+
+        if isinstance(data, dict):
+            # Check if this is a batch result
+            if 'batch_id' in data or 'results' in data:
+                logger.info("\n📊 BATCH VERIFICATION RESULTS:")
+                # Pretty-printing the full payload is debug-only, so
+                # production never encodes large result sets twice
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("%s", orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
+
+                # Process batch results if present
+                if 'results' in data and isinstance(data['results'], list):
+                    adults = sum(1 for r in data['results'] if r.get('is_adult'))
+                    logger.info("\nTotal emails processed: %d\nAdults (18+): %d\nMinors: %d",
+                                len(data['results']), adults,
+                                len(data['results']) - adults)
+
+                    # Save detailed results
+                    results_file = f"batch_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                    with open(results_file, 'wb') as f:
+                        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+                    logger.info("\n📁 Results saved to: %s", results_file)
+            else:
+                logger.info("\nData received:")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("%s", orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
+        else:
+            logger.info("\nRaw data: %s", data)
+
+        logger.info("%s\n", '='*60)
+    except Exception as e:
+        logger.error("\n❌ Error processing callback: %s", e)
 
 @app.route('/', methods=['GET'])
 def home():
@@ -64,13 +182,9 @@ def callback():
     Handles validation checks (GET/HEAD) and actual callbacks (POST)
     """
     
-    # Handle OPTIONS for CORS preflight
+    # Handle OPTIONS for CORS preflight (static headers, built once)
     if request.method == 'OPTIONS':
-        response = Response()
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, HEAD, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-        return response, 200
+        return Response(headers=_PREFLIGHT_HEADERS), 200
     
     # Handle HEAD requests (connection check)
     if request.method == 'HEAD':
@@ -99,91 +213,107 @@ def callback():
                 # Try to parse as JSON anyway
                 raw_data = request.get_data(as_text=True)
                 try:
-                    data = json.loads(raw_data) if raw_data else {}
+                    data = orjson.loads(raw_data) if raw_data else {}
                 except:
                     data = {"raw_data": raw_data}
             
-            # Create callback record
+            # Create callback record; headers are filtered to the useful
+            # few rather than materializing Werkzeug's lazy header map
             callback_record = {
                 "timestamp": datetime.now().isoformat(),
                 "method": request.method,
-                "headers": dict(request.headers),
+                "headers": {h: request.headers[h] for h in KEEP_HEADERS
+                            if h in request.headers},
                 "url": request.url,
                 "remote_addr": request.remote_addr,
                 "data": data
             }
             
-            # Store callback
-            callbacks_received.append(callback_record)
-            save_callback(callback_record)
-            
-            # Log to console
-            print(f"\n{'='*60}")
-            print(f"✅ CALLBACK RECEIVED at {callback_record['timestamp']}")
-            print(f"{'='*60}")
-            print(f"From: {request.remote_addr}")
-            print(f"Method: {request.method}")
-            print(f"Content-Type: {content_type}")
-            
-            if isinstance(data, dict):
-                # Check if this is a batch result
-                if 'batch_id' in data or 'results' in data:
-                    print("\n📊 BATCH VERIFICATION RESULTS:")
-                    print(json.dumps(data, indent=2))
-                    
-                    # Process batch results if present
-                    if 'results' in data and isinstance(data['results'], list):
-                        print(f"\nTotal emails processed: {len(data['results'])}")
-                        adults = sum(1 for r in data['results'] if r.get('is_adult'))
-                        print(f"Adults (18+): {adults}")
-                        print(f"Minors: {len(data['results']) - adults}")
-                        
-                        # Save detailed results
-                        results_file = f"batch_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                        with open(results_file, 'w') as f:
-                            json.dump(data, f, indent=2)
-                        print(f"\n📁 Results saved to: {results_file}")
-                else:
-                    print("\nData received:")
-                    print(json.dumps(data, indent=2))
-            else:
-                print(f"\nRaw data: {data}")
-            
-            print(f"{'='*60}\n")
-            
-            # Return success response
-            return jsonify({
+            # Store in memory and wake any long-polling /webhooks clients
+            # before responding, so a waiting monitor sees the record as
+            # soon as the sender gets its 200
+            global callbacks_total
+            with new_callback:
+                callbacks_received.append(callback_record)
+                callbacks_total += 1
+                callback_id = callbacks_total
+                new_callback.notify_all()
+            callback_event.set()
+
+            # Everything else — JSONL append, batch-results file,
+            # summarization, logging — happens off the request thread
+            _worker.submit(process_callback_record, callback_record, content_type)
+
+            # Return success response; orjson straight to bytes skips
+            # jsonify's dict walk on the hot path
+            return Response(orjson.dumps({
                 "status": "success",
                 "message": "Callback received and processed",
-                "timestamp": datetime.now().isoformat(),
-                "callback_id": len(callbacks_received)
-            }), 200
-            
+                "timestamp": callback_record["timestamp"],
+                "callback_id": callback_id
+            }), mimetype='application/json'), 200
+
         except Exception as e:
-            print(f"\n❌ Error processing callback: {e}")
-            return jsonify({
+            logger.error("\n❌ Error processing callback: %s", e)
+            return Response(orjson.dumps({
                 "status": "error",
                 "message": str(e)
-            }), 500
+            }), mimetype='application/json'), 500
 
 @app.route('/webhooks', methods=['GET'])
 def get_webhooks():
-    """View all received webhooks"""
-    # Reload from file to get all historical callbacks
-    all_callbacks = load_callbacks()
-    
+    """View all received webhooks
+
+    Supports long-polling: ?since=<count>&wait=<seconds> blocks until more
+    than <count> callbacks exist or the wait (capped at 30s) expires, so a
+    monitoring client needs one request instead of a sleep/poll loop.
+    """
+    try:
+        since = int(request.args.get('since', -1))
+        wait = min(float(request.args.get('wait', 0)), 30.0)
+    except ValueError:
+        since, wait = -1, 0
+
+    # The in-memory list is authoritative while the server runs; only go
+    # to disk for history on a cold start. Checked under the condition's
+    # lock so two concurrent first GETs can't both load and duplicate it.
+    # Loaded before the wait loop so existing history satisfies a
+    # long-poll immediately instead of stalling it for the full wait
+    global callbacks_total
+    with new_callback:
+        if not callbacks_received:
+            callbacks_received.extend(load_callbacks())
+            callbacks_total = max(callbacks_total, len(callbacks_received))
+
+    if wait > 0 and since >= 0:
+        deadline = time.monotonic() + wait
+        # Compare against the monotonic total, not the deque's length —
+        # the deque saturates at maxlen, so its length stops moving even
+        # as new callbacks keep arriving
+        with new_callback:
+            while callbacks_total <= since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not new_callback.wait(timeout=remaining):
+                    break
+
+    all_callbacks = callbacks_received
+
+    # Last 10 callbacks, oldest first, without materializing the deque
+    tail = list(islice(reversed(all_callbacks), 10))[::-1]
     return jsonify({
         "total": len(all_callbacks),
-        "callbacks": all_callbacks[-10:],  # Last 10 callbacks
-        "message": f"Showing last {min(10, len(all_callbacks))} of {len(all_callbacks)} callbacks"
+        "callbacks": tail,
+        "message": f"Showing last {len(tail)} of {len(all_callbacks)} callbacks"
     }), 200
 
 @app.route('/webhooks/clear', methods=['POST'])
 def clear_webhooks():
     """Clear all stored webhooks"""
-    global callbacks_received
-    callbacks_received = []
-    
+    global callbacks_total
+    with new_callback:
+        callbacks_received.clear()
+        callbacks_total = 0
+
     # Clear file
     if os.path.exists(CALLBACKS_FILE):
         os.remove(CALLBACKS_FILE)
@@ -211,7 +341,14 @@ def test():
     }), 200
 
 def run_server(port=5002):
-    """Run the enhanced webhook server"""
+    """Run the enhanced webhook server
+
+    Uses gunicorn (one gthread worker, 8 threads) when it is installed, so
+    concurrent /callback POSTs stop head-of-line blocking /webhooks GETs.
+    A single worker process keeps callbacks_received and the long-poll
+    condition shared; the threads provide the I/O parallelism. Falls back
+    to Flask's dev server (threaded) when gunicorn is absent.
+    """
     print("\n" + "="*60)
     print("🚀 ENHANCED WEBHOOK SERVER FOR VERIFYMYAGE")
     print("="*60)
@@ -224,8 +361,26 @@ def run_server(port=5002):
     print(f"\n⏳ Waiting for ngrok tunnel to be configured...")
     print(f"   Run: ngrok http {port}")
     print("="*60 + "\n")
-    
-    app.run(host='0.0.0.0', port=port, debug=False)
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("⚠️ gunicorn not installed; using Flask's dev server (threaded).")
+        print("   For production: pip install gunicorn\n")
+        app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
+        return
+
+    class _WebhookServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'0.0.0.0:{port}')
+            self.cfg.set('workers', 1)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', 8)
+
+        def load(self):
+            return app
+
+    _WebhookServer().run()
 
 if __name__ == "__main__":
     # Use port 5002 to avoid conflicts